@@ -0,0 +1,93 @@
+"""
+Redis read-through cache helpers
+"""
+import functools
+import logging
+from typing import Any, Callable, Optional
+
+import orjson
+from redis.exceptions import RedisError
+
+from database import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+async def get_json(key: str) -> Optional[Any]:
+    """Get a cached value, or None on a miss or when Redis is unavailable"""
+    if redis_client is None:
+        return None
+    try:
+        cached = await redis_client.get(key)
+    except RedisError as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+    return orjson.loads(cached) if cached is not None else None
+
+
+async def set_json(key: str, value: Any, ttl: int, tag: Optional[str] = None) -> None:
+    """Cache a JSON-serializable value for ttl seconds, optionally grouped under a tag"""
+    if redis_client is None:
+        return
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.setex(key, ttl, orjson.dumps(value))
+            if tag:
+                pipe.sadd(f"tag:{tag}", key)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+
+async def delete(*keys: str) -> None:
+    """Drop cached keys"""
+    if redis_client is None or not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except RedisError as e:
+        logger.warning("Cache delete failed for %s: %s", keys, e)
+
+
+# Reads the tag's members and deletes them with the tag set in one atomic step, so a key
+# tagged in between cannot lose its tag entry and outlive the invalidation
+_invalidate_tag_script = redis_client.register_script("""
+local keys = redis.call('SMEMBERS', KEYS[1])
+for i = 1, #keys, 1000 do
+    redis.call('DEL', unpack(keys, i, math.min(i + 999, #keys)))
+end
+redis.call('DEL', KEYS[1])
+return #keys
+""") if redis_client is not None else None
+
+
+async def invalidate_tag(tag: str) -> None:
+    """Drop every key cached under a tag"""
+    if redis_client is None:
+        return
+    tag_key = f"tag:{tag}"
+    try:
+        await _invalidate_tag_script(keys=[tag_key])
+    except RedisError as e:
+        logger.warning("Cache invalidation failed for %s: %s", tag_key, e)
+
+
+def cached(key_builder: Callable[..., str], ttl: int, tag: Optional[str] = None):
+    """
+    Read-through cache decorator for async functions returning JSON-serializable data.
+    key_builder is called with the same arguments as the wrapped function; when it
+    returns None the call is not cached.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = key_builder(*args, **kwargs)
+            if key is None:
+                return await fn(*args, **kwargs)
+            value = await get_json(key)
+            if value is None:
+                value = await fn(*args, **kwargs)
+                await set_json(key, value, ttl, tag)
+            return value
+        return wrapper
+    return decorator
@@ -1,300 +1,504 @@
 """
 CRUD (Create, Read, Update, Delete) operations
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, desc
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from sqlalchemy import Integer, Row, String, or_, and_, delete, desc, exists, func, insert, literal, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+from cachetools import TTLCache
+import cache
 import models
 import schemas
 
+# Users are resolved by handle on nearly every request; cache rows per worker and in Redis.
+# Writes delete the shared Redis copy, so it can live long; the per-worker copy is only
+# dropped in the worker that made the write, so it is kept short
+USER_CACHE_TTL = 300
+LOCAL_USER_CACHE_TTL = 30
+user_cache: TTLCache = TTLCache(maxsize=10000, ttl=LOCAL_USER_CACHE_TTL)
+
+# Feeds are shared across users; per-user liked/reposted flags are applied after the cache.
+# Writes invalidate the feeds tag, so the TTLs only bound staleness from writes made outside the API
+TIMELINE_CACHE_TTL = 30
+DISCOVER_CACHE_TTL = 60
+FEED_CACHE_TAG = "feeds"
+
+# Settings change only through PUT /settings, which deletes the cached payload
+SETTINGS_CACHE_TTL = 300
+
+# Advisory lock key so only one worker at a time refreshes the discover_feed view
+DISCOVER_REFRESH_LOCK_KEY = 0x646973636f76
+
 
 # ========== USER OPERATIONS ==========
 
-def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
-    """Get a user by username"""
-    return db.query(models.User).filter(models.User.username == username).first()
+def _user_cache_key(username: str) -> str:
+    return f"user:{username}"
 
 
-def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
-    """Get a user by ID"""
-    return db.query(models.User).filter(models.User.id == user_id).first()
+async def invalidate_user_cache(*usernames: str) -> None:
+    """Drop cached user rows, locally and in Redis"""
+    for username in usernames:
+        user_cache.pop(username, None)
+    await cache.delete(*[_user_cache_key(username) for username in usernames])
 
 
-# ========== POST OPERATIONS ==========
+async def _get_cached_user_data(username: str) -> Optional[dict]:
+    """Get a user's column values from the in-process cache or Redis, without touching the database"""
+    data = user_cache.get(username)
+    if data is None:
+        data = await cache.get_json(_user_cache_key(username))
+        if data is not None:
+            data["created_at"] = datetime.fromisoformat(data["created_at"]) if data["created_at"] else None
+            user_cache[username] = data
+    return data
 
-def get_timeline_posts(db: Session, limit: int = 50) -> List[models.Post]:
-    """Get timeline posts (all posts, ordered by most recent)"""
-    return db.query(models.Post).order_by(desc(models.Post.created_at)).limit(limit).all()
 
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[models.User]:
+    """
+    Get a user by username.
+    Checks the in-process cache, then Redis, then the database. Cache hits are
+    attached to the session with merge(load=False), which issues no SQL.
+    """
+    data = await _get_cached_user_data(username)
+    
+    if data is None:
+        user = await db.scalar(select(models.User).where(models.User.username == username))
+        if user:
+            data = {column.key: getattr(user, column.key) for column in models.User.__table__.columns}
+            user_cache[username] = data
+            await cache.set_json(_user_cache_key(username), data, USER_CACHE_TTL)
+        return user
+    
+    user = models.User(**data)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+async def get_user_with_settings(db: AsyncSession, username: str) -> Optional[models.User]:
+    """Get a user by username together with user.settings, in one query (always read from the database)"""
+    return await db.scalar(
+        select(models.User)
+        .options(joinedload(models.User.settings))
+        .where(models.User.username == username)
+        .execution_options(populate_existing=True)
+    )
 
-def get_discover_posts(db: Session, limit: int = 50) -> List[models.Post]:
-    """Get discover posts (trending/popular posts)"""
-    # For demo, return posts ordered by engagement (likes + reposts + comments)
-    return db.query(models.Post).order_by(
-        desc(models.Post.likes_count + models.Post.reposts_count + models.Post.comments_count)
-    ).limit(limit).all()
+
+# ========== POST OPERATIONS ==========
+
+async def get_timeline_posts(db: AsyncSession, limit: int = 50, before: Optional[Tuple[datetime, int]] = None) -> List[models.Post]:
+    """Get timeline posts (all posts, ordered by most recent), optionally only those before a (created_at, id) cursor"""
+    query = select(models.Post)
+    
+    if before is not None:
+        # id breaks ties between posts created in the same instant
+        query = query.where(tuple_(models.Post.created_at, models.Post.id) < tuple_(*before))
+    
+    # Seek on the (created_at, id) DESC index instead of sorting or skipping rows
+    result = await db.scalars(query.order_by(desc(models.Post.created_at), desc(models.Post.id)).limit(limit))
+    return result.all()
 
 
-def create_post(db: Session, user_id: int, username: str, content: str) -> models.Post:
+async def get_discover_posts(db: AsyncSession, limit: int = 50) -> List[models.Post]:
+    """Get discover posts (trending/popular posts)"""
+    # Ranked by the discover_feed materialized view; counts still come from the live posts rows
+    result = await db.scalars(
+        select(models.Post)
+        .join(models.discover_feed, models.discover_feed.c.id == models.Post.id)
+        .order_by(desc(models.discover_feed.c.hot_rank))
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def refresh_discover_feed(db: AsyncSession, min_age: float = 0) -> bool:
+    """
+    Recompute the discover_feed view, unless it was refreshed less than min_age seconds ago.
+    Returns False if skipped: another worker is refreshing it or has done so recently
+    """
+    refresh = await db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": DISCOVER_REFRESH_LOCK_KEY})
+    if refresh and min_age:
+        # Checked under the lock, so a worker that just waited out another's refresh sees it
+        refresh = not await db.scalar(select(exists().where(
+            models.discover_feed.c.refreshed_at > func.now() - timedelta(seconds=min_age)
+        )))
+    if refresh:
+        # CONCURRENTLY keeps the view readable by /discover while it is rebuilt
+        await db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY discover_feed"))
+    await db.commit()
+    return refresh
+
+
+def _serialize_posts(posts: List[models.Post]) -> List[dict]:
+    """Serialize posts to JSON-ready PostResponse payloads"""
+    return [schemas.PostResponse.model_validate(post).model_dump(mode="json") for post in posts]
+
+
+# Only the first page is cached; older pages are requested far less often
+@cache.cached(
+    lambda db, limit=50, before=None: f"timeline:{limit}" if before is None else None,
+    ttl=TIMELINE_CACHE_TTL,
+    tag=FEED_CACHE_TAG
+)
+async def get_timeline_feed(db: AsyncSession, limit: int = 50, before: Optional[Tuple[datetime, int]] = None) -> List[dict]:
+    """Get timeline posts as response payloads, served from the cache when warm"""
+    return _serialize_posts(await get_timeline_posts(db, limit, before))
+
+
+@cache.cached(lambda db, limit=50: f"discover:{limit}", ttl=DISCOVER_CACHE_TTL, tag=FEED_CACHE_TAG)
+async def get_discover_feed(db: AsyncSession, limit: int = 50) -> List[dict]:
+    """Get discover posts as response payloads, served from the cache when warm"""
+    return _serialize_posts(await get_discover_posts(db, limit))
+
+
+async def create_post(db: AsyncSession, user_id: int, username: str, content: str) -> models.Post:
     """Create a new post"""
-    post = models.Post(
+    # RETURNING populates server defaults (id, created_at, counters) without a refresh round trip
+    post = await db.scalar(insert(models.Post).values(
         author_id=user_id,
         author_handle=username,
         content=content
-    )
-    db.add(post)
-    db.commit()
-    db.refresh(post)
-    
-    # Update user's posts count
-    user = get_user_by_id(db, user_id)
-    if user:
-        user.posts_count += 1
-        db.commit()
+    ).returning(models.Post))
+    await db.commit()
     
+    # users.posts_count was bumped by the posts trigger; drop the cached copy
+    await invalidate_user_cache(username)
+    await cache.invalidate_tag(FEED_CACHE_TAG)
     return post
 
 
-def get_post_by_id(db: Session, post_id: int) -> Optional[models.Post]:
-    """Get a post by ID"""
-    return db.query(models.Post).filter(models.Post.id == post_id).first()
-
-
 # ========== POST INTERACTION OPERATIONS ==========
 
-def get_user_interaction(db: Session, post_id: int, user_id: int, interaction_type: str) -> Optional[models.PostInteraction]:
-    """Check if user has interacted with a post"""
-    return db.query(models.PostInteraction).filter(
+async def _toggle_interaction(db: AsyncSession, post_id: int, user_id: int, interaction_type: str) -> bool:
+    """Add or remove a like/repost (the post's counter is kept in step by a trigger)"""
+    # One statement: delete the interaction if present, otherwise insert it.
+    # WITH removed AS (DELETE ... RETURNING id)
+    # INSERT ... SELECT ... WHERE NOT EXISTS (SELECT id FROM removed) ON CONFLICT DO NOTHING
+    removed = delete(models.PostInteraction).where(
         models.PostInteraction.post_id == post_id,
         models.PostInteraction.user_id == user_id,
         models.PostInteraction.interaction_type == interaction_type
-    ).first()
-
-
-def toggle_like(db: Session, post_id: int, user_id: int) -> bool:
-    """Toggle like on a post"""
-    post = get_post_by_id(db, post_id)
-    if not post:
-        return False
+    ).returning(models.PostInteraction.id).cte("removed")
     
-    existing = get_user_interaction(db, post_id, user_id, "like")
+    # DO NOTHING: a concurrent request may have inserted the same interaction first
+    toggle = pg_insert(models.PostInteraction).from_select(
+        ["post_id", "user_id", "interaction_type"],
+        select(
+            literal(post_id, Integer),
+            literal(user_id, Integer),
+            literal(interaction_type, String)
+        ).where(~exists(select(removed.c.id)))
+    ).on_conflict_do_nothing().add_cte(removed)
     
-    if existing:
-        # Unlike
-        db.delete(existing)
-        post.likes_count = max(0, post.likes_count - 1)
-    else:
-        # Like
-        interaction = models.PostInteraction(
-            post_id=post_id,
-            user_id=user_id,
-            interaction_type="like"
-        )
-        db.add(interaction)
-        post.likes_count += 1
+    try:
+        await db.execute(toggle)
+    except IntegrityError:
+        # Foreign key violation: post does not exist
+        await db.rollback()
+        return False
     
-    db.commit()
+    await db.commit()
+    await cache.invalidate_tag(FEED_CACHE_TAG)
     return True
 
 
-def toggle_repost(db: Session, post_id: int, user_id: int) -> bool:
-    """Toggle repost on a post"""
-    post = get_post_by_id(db, post_id)
-    if not post:
-        return False
-    
-    existing = get_user_interaction(db, post_id, user_id, "repost")
-    
-    if existing:
-        # Unrepost
-        db.delete(existing)
-        post.reposts_count = max(0, post.reposts_count - 1)
-    else:
-        # Repost
-        interaction = models.PostInteraction(
-            post_id=post_id,
-            user_id=user_id,
-            interaction_type="repost"
-        )
-        db.add(interaction)
-        post.reposts_count += 1
-    
-    db.commit()
-    return True
+async def toggle_like(db: AsyncSession, post_id: int, user_id: int) -> bool:
+    """Toggle like on a post"""
+    return await _toggle_interaction(db, post_id, user_id, "like")
 
 
-def check_user_liked_post(db: Session, post_id: int, user_id: int) -> bool:
-    """Check if user liked a post"""
-    return get_user_interaction(db, post_id, user_id, "like") is not None
+async def toggle_repost(db: AsyncSession, post_id: int, user_id: int) -> bool:
+    """Toggle repost on a post"""
+    return await _toggle_interaction(db, post_id, user_id, "repost")
 
 
-def check_user_reposted(db: Session, post_id: int, user_id: int) -> bool:
-    """Check if user reposted a post"""
-    return get_user_interaction(db, post_id, user_id, "repost") is not None
+async def get_user_interactions_for_posts(db: AsyncSession, user_id: int, post_ids: List[int]) -> Tuple[Set[int], Set[int]]:
+    """Get the IDs of the given posts a user has liked and reposted, in one query"""
+    liked_ids: Set[int] = set()
+    reposted_ids: Set[int] = set()
+    if not post_ids:
+        return liked_ids, reposted_ids
+    
+    result = await db.execute(
+        select(models.PostInteraction.post_id, models.PostInteraction.interaction_type).where(
+            models.PostInteraction.user_id == user_id,
+            models.PostInteraction.post_id.in_(post_ids)
+        )
+    )
+    
+    for post_id, interaction_type in result:
+        if interaction_type == "like":
+            liked_ids.add(post_id)
+        elif interaction_type == "repost":
+            reposted_ids.add(post_id)
+    
+    return liked_ids, reposted_ids
 
 
 # ========== COMMENT OPERATIONS ==========
 
-def get_comments(db: Session, post_id: int) -> List[models.Comment]:
-    """Get all comments for a post"""
-    return db.query(models.Comment).filter(
-        models.Comment.post_id == post_id
-    ).order_by(models.Comment.created_at).all()
+async def get_comments(db: AsyncSession, post_id: int, before: Optional[Tuple[datetime, int]] = None, limit: int = 50) -> List[Row]:
+    """
+    Get a page of comments for a post (oldest first), optionally only those before a (created_at, id) cursor.
+    Returns plain (id, username, text, created_at) rows rather than ORM entities.
+    """
+    query = select(
+        models.Comment.id,
+        models.Comment.username,
+        models.Comment.text,
+        models.Comment.created_at
+    ).where(models.Comment.post_id == post_id)
+    
+    if before is not None:
+        # id breaks ties between comments created in the same instant
+        query = query.where(tuple_(models.Comment.created_at, models.Comment.id) < tuple_(*before))
+    
+    # Seek backwards from the cursor on the (post_id, created_at, id) index, then restore chronological order
+    result = await db.execute(
+        query.order_by(desc(models.Comment.created_at), desc(models.Comment.id)).limit(limit)
+    )
+    return result.all()[::-1]
 
 
-def add_comment(db: Session, post_id: int, user_id: int, username: str, text: str) -> models.Comment:
-    """Add a comment to a post"""
-    comment = models.Comment(
+async def add_comment(db: AsyncSession, post_id: int, user_id: int, username: str, text: str) -> models.Comment:
+    """Add a comment to a post (posts.comments_count is kept in step by a trigger)"""
+    comment = await db.scalar(insert(models.Comment).values(
         post_id=post_id,
         user_id=user_id,
         username=username,
         text=text
-    )
-    db.add(comment)
-    
-    # Update post comments count
-    post = get_post_by_id(db, post_id)
-    if post:
-        post.comments_count += 1
-    
-    db.commit()
-    db.refresh(comment)
+    ).returning(models.Comment))
+    await db.commit()
+    await cache.invalidate_tag(FEED_CACHE_TAG)
     return comment
 
 
 # ========== CONVERSATION OPERATIONS ==========
 
-def get_conversations_for_user(db: Session, user_id: int) -> List[models.Conversation]:
-    """Get all conversations for a user"""
-    return db.query(models.Conversation).filter(
+async def get_conversations_for_user(db: AsyncSession, user_id: int) -> List[models.Conversation]:
+    """Get all conversations for a user (participant handles are stored on each row)"""
+    result = await db.scalars(select(models.Conversation).where(
         or_(
             models.Conversation.participant_a_id == user_id,
             models.Conversation.participant_b_id == user_id
         )
-    ).order_by(desc(models.Conversation.last_message_at)).all()
-
+    ).order_by(desc(models.Conversation.last_message_at)))
+    return result.all()
 
-def get_conversation_by_id(db: Session, conversation_id: int) -> Optional[models.Conversation]:
-    """Get a conversation by ID"""
-    return db.query(models.Conversation).filter(models.Conversation.id == conversation_id).first()
 
-
-def get_or_create_conversation(db: Session, user_a_id: int, user_b_id: int) -> models.Conversation:
+async def get_or_create_conversation(db: AsyncSession, user_a: models.User, user_b: models.User) -> models.Conversation:
     """Get or create a conversation between two users"""
     # Ensure participant_a_id < participant_b_id
-    min_id, max_id = min(user_a_id, user_b_id), max(user_a_id, user_b_id)
-    
-    # Check if conversation exists
-    conversation = db.query(models.Conversation).filter(
-        models.Conversation.participant_a_id == min_id,
-        models.Conversation.participant_b_id == max_id
-    ).first()
+    first, second = sorted((user_a, user_b), key=lambda user: user.id)
     
-    if conversation:
-        return conversation
-    
-    # Create new conversation
-    conversation = models.Conversation(
-        participant_a_id=min_id,
-        participant_b_id=max_id
-    )
-    db.add(conversation)
-    db.commit()
-    db.refresh(conversation)
+    # Single-statement upsert: atomic under concurrent first DMs between the same pair.
+    # The no-op DO UPDATE (rather than DO NOTHING) makes RETURNING yield the existing row.
+    conversation = await db.scalar(pg_insert(models.Conversation).values(
+        participant_a_id=first.id,
+        participant_a_handle=first.username,
+        participant_b_id=second.id,
+        participant_b_handle=second.username
+    ).on_conflict_do_update(
+        index_elements=['participant_a_id', 'participant_b_id'],
+        set_={'participant_a_id': models.Conversation.participant_a_id}
+    ).returning(models.Conversation))
+    await db.commit()
     return conversation
 
 
 # ========== MESSAGE OPERATIONS ==========
 
-def get_messages_for_conversation(db: Session, conversation_id: int) -> List[models.Message]:
-    """Get all messages for a conversation"""
-    return db.query(models.Message).filter(
-        models.Message.conversation_id == conversation_id
-    ).order_by(models.Message.created_at).all()
+async def get_messages_for_conversation(db: AsyncSession, conversation_id: int, before: Optional[Tuple[datetime, int]] = None, limit: int = 50) -> List[Row]:
+    """
+    Get a page of messages for a conversation (oldest first), optionally only those before a (created_at, id) cursor.
+    Returns plain rows with the MessageResponse columns rather than ORM entities.
+    """
+    query = select(
+        models.Message.id,
+        models.Message.sender_id,
+        models.Message.content,
+        models.Message.created_at,
+        models.Message.is_read
+    ).where(models.Message.conversation_id == conversation_id)
+    
+    if before is not None:
+        # id breaks ties between messages sent in the same instant
+        query = query.where(tuple_(models.Message.created_at, models.Message.id) < tuple_(*before))
+    
+    # Seek backwards from the cursor on the (conversation_id, created_at, id) index, then restore chronological order
+    result = await db.execute(
+        query.order_by(desc(models.Message.created_at), desc(models.Message.id)).limit(limit)
+    )
+    return result.all()[::-1]
 
 
-def create_message(db: Session, conversation_id: int, sender_id: int, sender_handle: str, content: str) -> models.Message:
+async def create_message(db: AsyncSession, conversation_id: int, sender_id: int, sender_handle: str, content: str) -> models.Message:
     """Create a new message in a conversation"""
-    message = models.Message(
+    message = await db.scalar(insert(models.Message).values(
         conversation_id=conversation_id,
         sender_id=sender_id,
         sender_handle=sender_handle,
         content=content,
         is_read=False
-    )
-    db.add(message)
+    ).returning(models.Message))
     
     # Update conversation's last message
-    conversation = get_conversation_by_id(db, conversation_id)
-    if conversation:
-        conversation.last_message_preview = content[:50] + "..." if len(content) > 50 else content
-        conversation.last_message_at = message.created_at
+    await db.execute(
+        update(models.Conversation)
+        .where(models.Conversation.id == conversation_id)
+        .values(
+            last_message_preview=content[:50] + "..." if len(content) > 50 else content,
+            last_message_at=message.created_at
+        )
+        .execution_options(synchronize_session=False)
+    )
     
-    db.commit()
-    db.refresh(message)
+    await db.commit()
     return message
 
 
 # ========== NOTIFICATION OPERATIONS ==========
 
-def get_notifications_for_user(db: Session, user_id: int, unread_only: bool = False) -> List[models.Notification]:
-    """Get notifications for a user"""
-    query = db.query(models.Notification).filter(models.Notification.user_id == user_id)
+async def get_notifications_for_user(db: AsyncSession, user_id: int, unread_only: bool = False) -> List[Row]:
+    """Get notifications for a user, as plain rows with the NotificationResponse columns"""
+    query = select(
+        models.Notification.id,
+        models.Notification.type,
+        models.Notification.actor_handle,
+        models.Notification.content,
+        models.Notification.created_at,
+        models.Notification.read,
+        models.Notification.post_id
+    ).where(models.Notification.user_id == user_id)
     
     if unread_only:
-        query = query.filter(models.Notification.read == False)
+        query = query.where(models.Notification.read == False)
     
-    return query.order_by(desc(models.Notification.created_at)).all()
+    result = await db.execute(query.order_by(desc(models.Notification.created_at)))
+    return result.all()
 
 
-def mark_notification_read(db: Session, notification_id: int) -> bool:
+async def mark_notification_read(db: AsyncSession, notification_id: int) -> bool:
     """Mark a notification as read"""
-    notification = db.query(models.Notification).filter(models.Notification.id == notification_id).first()
+    notification = await db.scalar(select(models.Notification).where(models.Notification.id == notification_id))
     if not notification:
         return False
     
     notification.read = True
-    db.commit()
+    await db.commit()
     return True
 
 
 # ========== SETTINGS OPERATIONS ==========
 
-def get_user_settings(db: Session, user_id: int) -> Optional[models.UserSettings]:
-    """Get user settings"""
-    return db.query(models.UserSettings).filter(models.UserSettings.user_id == user_id).first()
+def _settings_cache_key(user_id: int) -> str:
+    # Keyed by id, not handle: a handle can be renamed away and later taken by a new user
+    return f"settings:{user_id}"
 
 
-def update_user_settings(db: Session, user_id: int, settings_update: schemas.SettingsUpdate) -> Optional[models.UserSettings]:
+async def get_user_settings(db: AsyncSession, user_id: int) -> Optional[models.UserSettings]:
+    """Get user settings"""
+    return await db.scalar(select(models.UserSettings).where(models.UserSettings.user_id == user_id))
+
+
+async def get_settings_payload(db: AsyncSession, username: str) -> Optional[dict]:
+    """
+    Get the /settings response for a user, or None if there is no such user.
+    Served from the cache when warm; otherwise the user and its settings are read in one query.
+    """
+    data = await _get_cached_user_data(username)
+    if data is not None:
+        payload = await cache.get_json(_settings_cache_key(data["id"]))
+        if payload is not None:
+            return payload
+    
+    # Looked up by username rather than a cached id, so the payload is always built from the current row
+    user = await get_user_with_settings(db, username)
+    if not user:
+        return None
+    payload = _build_settings_payload(user)
+    await cache.set_json(_settings_cache_key(user.id), payload, SETTINGS_CACHE_TTL)
+    return payload
+
+
+def _build_settings_payload(user: models.User) -> dict:
+    """Serialize a user (with settings loaded) to a JSON-ready SettingsResponse payload"""
+    settings = user.settings
+    
+    if not settings:
+        # Return default settings with user info
+        return schemas.SettingsResponse(
+            username=user.username,
+            display_name=user.display_name,
+            bio=user.bio,
+            email_notifications=True,
+            show_online_status=True,
+            private_account=False,
+            github_connected=False,
+            gitlab_connected=False,
+            google_connected=False,
+            discord_connected=False,
+            ascii_pic=user.ascii_pic
+        ).model_dump(mode="json")
+    
+    return schemas.SettingsResponse(
+        username=user.username,
+        display_name=user.display_name,
+        bio=user.bio,
+        email_notifications=settings.email_notifications,
+        show_online_status=settings.show_online_status,
+        private_account=settings.private_account,
+        github_connected=settings.github_connected,
+        gitlab_connected=settings.gitlab_connected,
+        google_connected=settings.google_connected,
+        discord_connected=settings.discord_connected,
+        ascii_pic=user.ascii_pic
+    ).model_dump(mode="json")
+
+
+async def update_user_settings(db: AsyncSession, user: models.User, settings_update: schemas.SettingsUpdate) -> Optional[models.UserSettings]:
     """Update user settings"""
-    settings = get_user_settings(db, user_id)
+    settings = await get_user_settings(db, user.id)
     if not settings:
         # Create default settings if they don't exist
-        settings = models.UserSettings(user_id=user_id)
+        settings = models.UserSettings(user_id=user.id)
         db.add(settings)
     
     # Update settings fields
     update_data = settings_update.model_dump(exclude_unset=True)
     
     # Handle user profile updates separately
+    old_username = user.username
+    stale_usernames = []
     if 'username' in update_data or 'display_name' in update_data or 'bio' in update_data or 'ascii_pic' in update_data:
-        user = get_user_by_id(db, user_id)
-        if user:
-            if 'username' in update_data:
-                user.username = update_data.pop('username')
-            if 'display_name' in update_data:
-                user.display_name = update_data.pop('display_name')
-            if 'bio' in update_data:
-                user.bio = update_data.pop('bio')
-            if 'ascii_pic' in update_data:
-                user.ascii_pic = update_data.pop('ascii_pic')
+        stale_usernames.append(old_username)
+        if 'username' in update_data:
+            user.username = update_data.pop('username')
+            # Keep the denormalized handles on the user's conversations in step
+            await db.execute(update(models.Conversation).where(
+                models.Conversation.participant_a_id == user.id
+            ).values(participant_a_handle=user.username))
+            await db.execute(update(models.Conversation).where(
+                models.Conversation.participant_b_id == user.id
+            ).values(participant_b_handle=user.username))
+        if 'display_name' in update_data:
+            user.display_name = update_data.pop('display_name')
+        if 'bio' in update_data:
+            user.bio = update_data.pop('bio')
+        if 'ascii_pic' in update_data:
+            user.ascii_pic = update_data.pop('ascii_pic')
     
     # Update remaining settings
     for key, value in update_data.items():
         if hasattr(settings, key):
             setattr(settings, key, value)
     
-    db.commit()
-    db.refresh(settings)
+    await db.commit()
+    await db.refresh(settings)
+    await invalidate_user_cache(*stale_usernames)
+    await cache.delete(_settings_cache_key(user.id))
     return settings
-
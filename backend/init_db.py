@@ -10,6 +10,7 @@ Or locally:
     python init_db.py
 """
 import os
+import re
 import sys
 from pathlib import Path
 
@@ -20,6 +21,54 @@ except ImportError:
     sys.exit(1)
 
 
+# Statement separators, plus the comments, strings and $$ bodies whose ;s don't separate statements
+_SQL_TOKEN = re.compile(r"--[^\n]*|'(?:[^']|'')*'|(\$\w*\$).*?\1|;", re.DOTALL)
+_LEADING_COMMENTS = re.compile(r"^(?:\s+|--[^\n]*)*")
+
+
+def split_sql_statements(sql):
+    """Yield the (offset, text) of each statement in a SQL script"""
+    start = 0
+    for match in _SQL_TOKEN.finditer(sql):
+        if match.group() == ";":
+            yield start, sql[start:match.end()]
+            start = match.end()
+    if sql[start:].strip():
+        yield start, sql[start:]
+
+
+def execute_sql_file(cur, sql_file):
+    """
+    Execute a SQL file in a single round trip.
+    On failure, report the line of the statement Postgres rejected.
+    """
+    with open(sql_file, 'r') as f:
+        sql = f.read()
+    
+    cur.execute("SAVEPOINT sql_file")
+    try:
+        cur.execute(sql)
+    except psycopg2.Error as e:
+        position = e.diag.statement_position
+        if position:
+            line = sql.count("\n", 0, int(position) - 1) + 1
+            print(f"Error in {sql_file.name} at line {line}")
+        else:
+            # Runtime errors (constraints, triggers, ...) carry no position; replay the file
+            # statement by statement to find the one that fails
+            cur.execute("ROLLBACK TO SAVEPOINT sql_file")
+            for index, (offset, statement) in enumerate(split_sql_statements(sql), start=1):
+                try:
+                    cur.execute(statement)
+                except psycopg2.Error:
+                    code = _LEADING_COMMENTS.sub("", statement)
+                    line = sql.count("\n", 0, offset + len(statement) - len(code)) + 1
+                    first_line = code.splitlines()[0]
+                    print(f"Error in {sql_file.name} at line {line} (statement {index}: {first_line})")
+                    break
+        raise
+
+
 def init_database():
     """Initialize database with schema and seed data"""
     database_url = os.getenv("DATABASE_URL")
@@ -32,7 +81,8 @@ def init_database():
     
     try:
         conn = psycopg2.connect(database_url)
-        conn.autocommit = True
+        # Schema and seed data are applied in one transaction: all or nothing
+        conn.autocommit = False
         cur = conn.cursor()
         
         # Get path to SQL files
@@ -44,8 +94,7 @@ def init_database():
         # Execute schema
         print("Creating database schema...")
         if schema_file.exists():
-            with open(schema_file, 'r') as f:
-                cur.execute(f.read())
+            execute_sql_file(cur, schema_file)
             print("✓ Schema created successfully")
         else:
             print(f"Warning: Schema file not found at {schema_file}")
@@ -53,12 +102,13 @@ def init_database():
         # Execute seed data
         print("Loading seed data...")
         if seed_file.exists():
-            with open(seed_file, 'r') as f:
-                cur.execute(f.read())
+            execute_sql_file(cur, seed_file)
             print("✓ Seed data loaded successfully")
         else:
             print(f"Warning: Seed data file not found at {seed_file}")
         
+        conn.commit()
+        
         # Verify tables
         cur.execute("""
             SELECT table_name 
@@ -1,25 +1,35 @@
 """
 FastAPI backend for Social.vim application
 """
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import logging
+import orjson
+import os
 import uvicorn
 
 import models
 import schemas
 import crud
-from database import engine, get_db
+import cache
+from database import SessionLocal, engine, get_db
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Social.vim API",
     description="Backend API for Social.vim TUI application",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -29,17 +39,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Compress larger JSON payloads (feeds, message history) for clients sending Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+
+# Arbitrary key for the startup DDL lock; every worker uses the same one
+SCHEMA_LOCK_KEY = 0x736f6369616c
+
+
+@app.on_event("startup")
+async def create_tables():
+    """Create database tables (serialized across workers by an advisory lock)"""
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        await conn.run_sync(models.Base.metadata.create_all)
+
+
+# How often the discover_feed materialized view is recomputed
+DISCOVER_REFRESH_SECONDS = int(os.getenv("DISCOVER_REFRESH_SECONDS", "120"))
+
+
+async def refresh_discover_feed_periodically():
+    """
+    Keep /discover rankings fresh. Every worker runs this loop, but a worker skips the refresh
+    when another has done it within the interval, so the view is rebuilt about once per interval
+    """
+    while True:
+        try:
+            async with SessionLocal() as db:
+                await crud.refresh_discover_feed(db, min_age=DISCOVER_REFRESH_SECONDS)
+        except Exception:
+            logger.exception("Failed to refresh discover_feed")
+        await asyncio.sleep(DISCOVER_REFRESH_SECONDS)
+
+
+@app.on_event("startup")
+async def start_discover_refresh():
+    """Start the discover_feed refresh loop"""
+    app.state.discover_refresh_task = asyncio.create_task(refresh_discover_feed_periodically())
+
+
+@app.on_event("shutdown")
+async def stop_discover_refresh():
+    """Stop the discover_feed refresh loop"""
+    app.state.discover_refresh_task.cancel()
+
 
 # ========== UTILITY FUNCTIONS ==========
 
-def get_current_user_from_handle(db: Session, handle: str, auto_create: bool = True) -> models.User:
+async def get_current_user_from_handle(db: AsyncSession, handle: str, auto_create: bool = True) -> models.User:
     """
     Get current user by handle (username).
     Auto-creates user if they don't exist (when auto_create=True).
     """
-    user = crud.get_user_by_username(db, handle)
+    user = await crud.get_user_by_username(db, handle)
     
     if not user and auto_create:
         # Auto-create new user
@@ -52,122 +108,161 @@ def get_current_user_from_handle(db: Session, handle: str, auto_create: bool = T
             posts_count=0
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
-        
-        # Create default settings
-        settings = models.UserSettings(
-            user_id=user.id,
-            email_notifications=True,
-            show_online_status=True,
-            private_account=False
-        )
-        db.add(settings)
-        db.commit()
+        try:
+            # The flush hits the unique username constraint first when another request won the race
+            await db.flush()
+            
+            # Create default settings, committed together with the user
+            settings = models.UserSettings(
+                user_id=user.id,
+                email_notifications=True,
+                show_online_status=True,
+                private_account=False
+            )
+            db.add(settings)
+            await db.commit()
+        except IntegrityError:
+            # A concurrent request created the same handle first; use that user
+            await db.rollback()
+            user = await crud.get_user_by_username(db, handle)
     elif not user:
         raise HTTPException(status_code=404, detail=f"User '{handle}' not found")
     
     return user
 
 
+def parse_cursor(before: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Decode a "<created_at>,<id>" keyset cursor (as sent in X-Next-Cursor) into a (created_at, id) pair"""
+    if before is None:
+        return None
+    created_at, _, row_id = before.rpartition(",")
+    try:
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, page: list, limit: int, newest_first: bool = False) -> None:
+    """
+    Expose the keyset cursor ("<created_at>,<id>" of the oldest item) for the next (older) page of a list.
+    Only set when the page is full, i.e. when older rows may exist. Items are rows or serialized dicts.
+    """
+    if page and len(page) == limit:
+        oldest = page[-1] if newest_first else page[0]
+        if isinstance(oldest, dict):
+            created_at, row_id = datetime.fromisoformat(oldest["created_at"]), oldest["id"]
+        else:
+            created_at, row_id = oldest.created_at, oldest.id
+        # Always UTC with a "Z" suffix: a "+00:00" offset would turn into a space when pasted unencoded into a URL
+        created_at = created_at.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        response.headers["X-Next-Cursor"] = f"{created_at},{row_id}"
+
+
 # ========== USER ENDPOINTS ==========
 
 @app.get("/me", response_model=schemas.UserResponse)
-def get_current_user(
+async def get_current_user(
     handle: str = Query(..., description="Username/handle of the current user"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current user profile.
     Auto-creates user if they don't exist (for demo purposes).
     """
-    user = get_current_user_from_handle(db, handle, auto_create=True)
-    return schemas.UserResponse.from_orm(user)
+    user = await get_current_user_from_handle(db, handle, auto_create=True)
+    return schemas.UserResponse.model_validate(user)
 
 
 # ========== POST ENDPOINTS ==========
 
+# List endpoints return an ORJSONResponse directly: response_model still documents the
+# payload in OpenAPI, but FastAPI skips re-validating every item against it
+
 @app.get("/timeline", response_model=List[schemas.PostResponse])
-def get_timeline(
+async def get_timeline(
     limit: int = Query(50, ge=1, le=100),
+    before: Optional[str] = Query(None, description="Only return posts created before this X-Next-Cursor value"),
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get timeline posts (recent posts from all users)"""
-    posts = crud.get_timeline_posts(db, limit)
+    """
+    Get timeline posts (recent posts from all users), newest first.
+    When more posts may exist, the cursor for the next (older) page is sent in the X-Next-Cursor header.
+    """
+    posts = await crud.get_timeline_feed(db, limit, parse_cursor(before))
     
     # Get current user to check interactions
-    user = crud.get_user_by_username(db, handle)
-    user_id = user.id if user else None
+    user = await crud.get_user_by_username(db, handle)
     
-    # Build response with user interaction status
-    result = []
-    for post in posts:
-        liked = crud.check_user_liked_post(db, post.id, user_id) if user_id else False
-        reposted = crud.check_user_reposted(db, post.id, user_id) if user_id else False
-        result.append(schemas.PostResponse.from_orm(post, user_id, liked, reposted))
+    # Overlay the user's likes/reposts, fetched for all posts at once
+    if user:
+        liked_ids, reposted_ids = await crud.get_user_interactions_for_posts(db, user.id, [post["id"] for post in posts])
+        for post in posts:
+            post["liked_by_user"] = post["id"] in liked_ids
+            post["reposted_by_user"] = post["id"] in reposted_ids
     
-    return result
+    response = ORJSONResponse(posts)
+    set_next_cursor(response, posts, limit, newest_first=True)
+    return response
 
 
 @app.get("/discover", response_model=List[schemas.PostResponse])
-def get_discover(
+async def get_discover(
     limit: int = Query(50, ge=1, le=100),
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get discover posts (trending/popular posts)"""
-    posts = crud.get_discover_posts(db, limit)
+    posts = await crud.get_discover_feed(db, limit)
     
     # Get current user to check interactions
-    user = crud.get_user_by_username(db, handle)
-    user_id = user.id if user else None
+    user = await crud.get_user_by_username(db, handle)
     
-    # Build response with user interaction status
-    result = []
-    for post in posts:
-        liked = crud.check_user_liked_post(db, post.id, user_id) if user_id else False
-        reposted = crud.check_user_reposted(db, post.id, user_id) if user_id else False
-        result.append(schemas.PostResponse.from_orm(post, user_id, liked, reposted))
+    # Overlay the user's likes/reposts, fetched for all posts at once
+    if user:
+        liked_ids, reposted_ids = await crud.get_user_interactions_for_posts(db, user.id, [post["id"] for post in posts])
+        for post in posts:
+            post["liked_by_user"] = post["id"] in liked_ids
+            post["reposted_by_user"] = post["id"] in reposted_ids
     
-    return result
+    return ORJSONResponse(posts)
 
 
 @app.post("/posts", response_model=schemas.PostResponse)
-def create_post(
+async def create_post(
     post_data: schemas.PostCreate,
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new post"""
-    user = get_current_user_from_handle(db, handle)
-    post = crud.create_post(db, user.id, user.username, post_data.content)
-    return schemas.PostResponse.from_orm(post, user.id, False, False)
+    user = await get_current_user_from_handle(db, handle)
+    post = await crud.create_post(db, user.id, user.username, post_data.content)
+    return schemas.PostResponse.model_validate(post)
 
 
 @app.post("/posts/{post_id}/like")
-def like_post(
+async def like_post(
     post_id: int,
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Toggle like on a post"""
-    user = get_current_user_from_handle(db, handle)
-    success = crud.toggle_like(db, post_id, user.id)
+    user = await get_current_user_from_handle(db, handle)
+    success = await crud.toggle_like(db, post_id, user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Post not found")
     return {"success": True}
 
 
 @app.post("/posts/{post_id}/repost")
-def repost_post(
+async def repost_post(
     post_id: int,
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Toggle repost on a post"""
-    user = get_current_user_from_handle(db, handle)
-    success = crud.toggle_repost(db, post_id, user.id)
+    user = await get_current_user_from_handle(db, handle)
+    success = await crud.toggle_repost(db, post_id, user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Post not found")
     return {"success": True}
@@ -176,108 +271,111 @@ def repost_post(
 # ========== COMMENT ENDPOINTS ==========
 
 @app.get("/posts/{post_id}/comments", response_model=List[schemas.CommentResponse])
-def get_comments(
+async def get_comments(
     post_id: int,
-    db: Session = Depends(get_db)
+    before: Optional[str] = Query(None, description="Only return comments created before this X-Next-Cursor value"),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all comments for a post"""
-    comments = crud.get_comments(db, post_id)
-    return [schemas.CommentResponse(user=c.username, text=c.text) for c in comments]
+    """
+    Get a page of comments for a post, oldest first.
+    When more comments may exist, the cursor for the previous page is sent in the X-Next-Cursor header.
+    """
+    comments = await crud.get_comments(db, post_id, parse_cursor(before), limit)
+    response = ORJSONResponse([{"user": c.username, "text": c.text} for c in comments])
+    set_next_cursor(response, comments, limit)
+    return response
 
 
 @app.post("/posts/{post_id}/comments", response_model=schemas.CommentResponse)
-def add_comment(
+async def add_comment(
     post_id: int,
     comment_data: schemas.CommentCreate,
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Add a comment to a post"""
-    user = get_current_user_from_handle(db, handle)
-    comment = crud.add_comment(db, post_id, user.id, user.username, comment_data.text)
+    user = await get_current_user_from_handle(db, handle)
+    comment = await crud.add_comment(db, post_id, user.id, user.username, comment_data.text)
     return schemas.CommentResponse(user=comment.username, text=comment.text)
 
 
 # ========== CONVERSATION & MESSAGE ENDPOINTS ==========
 
 @app.get("/conversations", response_model=List[schemas.ConversationResponse])
-def get_conversations(
+async def get_conversations(
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all conversations for the current user"""
-    user = get_current_user_from_handle(db, handle)
-    conversations = crud.get_conversations_for_user(db, user.id)
+    user = await get_current_user_from_handle(db, handle)
+    conversations = await crud.get_conversations_for_user(db, user.id)
     
-    result = []
-    for conv in conversations:
-        # Get participant handles
-        user_a = crud.get_user_by_id(db, conv.participant_a_id)
-        user_b = crud.get_user_by_id(db, conv.participant_b_id)
-        
-        handles = []
-        if user_a:
-            handles.append(user_a.username)
-        if user_b:
-            handles.append(user_b.username)
-        
-        result.append(schemas.ConversationResponse(
-            id=conv.id,
-            participant_handles=handles,
-            last_message_preview=conv.last_message_preview,
-            last_message_at=conv.last_message_at,
-            unread=False  # TODO: implement unread logic
-        ))
-    
-    return result
+    return ORJSONResponse([
+        {
+            "id": conv.id,
+            "participant_handles": [conv.participant_a_handle, conv.participant_b_handle],
+            "last_message_preview": conv.last_message_preview,
+            "last_message_at": conv.last_message_at,
+            "unread": False  # TODO: implement unread logic
+        }
+        for conv in conversations
+    ])
 
 
 @app.get("/conversations/{conversation_id}/messages", response_model=List[schemas.MessageResponse])
-def get_conversation_messages(
+async def get_conversation_messages(
     conversation_id: int,
-    db: Session = Depends(get_db)
+    before: Optional[str] = Query(None, description="Only return messages sent before this X-Next-Cursor value"),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all messages in a conversation"""
-    messages = crud.get_messages_for_conversation(db, conversation_id)
-    return [schemas.MessageResponse.from_orm(m) for m in messages]
+    """
+    Get a page of messages in a conversation, oldest first.
+    When more messages may exist, the cursor for the previous page is sent in the X-Next-Cursor header.
+    """
+    messages = await crud.get_messages_for_conversation(db, conversation_id, parse_cursor(before), limit)
+    response = ORJSONResponse([schemas.MessageResponse.model_validate(m).model_dump(mode="json") for m in messages])
+    set_next_cursor(response, messages, limit)
+    return response
 
 
 @app.post("/conversations/{conversation_id}/messages", response_model=schemas.MessageResponse)
-def send_message(
+async def send_message(
     conversation_id: int,
     message_data: schemas.MessageCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Send a message in a conversation"""
-    sender = crud.get_user_by_username(db, message_data.sender_handle)
+    sender = await crud.get_user_by_username(db, message_data.sender_handle)
     if not sender:
         raise HTTPException(status_code=404, detail="Sender not found")
     
-    message = crud.create_message(
+    message = await crud.create_message(
         db, 
         conversation_id, 
         sender.id, 
         sender.username, 
         message_data.content
     )
-    return schemas.MessageResponse.from_orm(message)
+    return schemas.MessageResponse.model_validate(message)
 
 
 @app.post("/dm", response_model=schemas.ConversationResponse)
-def get_or_create_dm(
+async def get_or_create_dm(
     conversation_data: schemas.ConversationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get or create a direct message conversation between two users"""
-    user_a = crud.get_user_by_username(db, conversation_data.user_a_handle)
-    user_b = crud.get_user_by_username(db, conversation_data.user_b_handle)
+    user_a = await crud.get_user_by_username(db, conversation_data.user_a_handle)
+    user_b = await crud.get_user_by_username(db, conversation_data.user_b_handle)
     
     if not user_a:
         raise HTTPException(status_code=404, detail=f"User '{conversation_data.user_a_handle}' not found")
     if not user_b:
         raise HTTPException(status_code=404, detail=f"User '{conversation_data.user_b_handle}' not found")
     
-    conversation = crud.get_or_create_conversation(db, user_a.id, user_b.id)
+    conversation = await crud.get_or_create_conversation(db, user_a, user_b)
     
     return schemas.ConversationResponse(
         id=conversation.id,
@@ -291,24 +389,24 @@ def get_or_create_dm(
 # ========== NOTIFICATION ENDPOINTS ==========
 
 @app.get("/notifications", response_model=List[schemas.NotificationResponse])
-def get_notifications(
+async def get_notifications(
     unread: bool = Query(False, description="Get only unread notifications"),
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get notifications for the current user"""
-    user = get_current_user_from_handle(db, handle)
-    notifications = crud.get_notifications_for_user(db, user.id, unread)
-    return [schemas.NotificationResponse.from_orm(n) for n in notifications]
+    user = await get_current_user_from_handle(db, handle)
+    notifications = await crud.get_notifications_for_user(db, user.id, unread)
+    return ORJSONResponse([schemas.NotificationResponse.model_validate(n).model_dump(mode="json") for n in notifications])
 
 
 @app.post("/notifications/{notification_id}/read")
-def mark_notification_read(
+async def mark_notification_read(
     notification_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Mark a notification as read"""
-    success = crud.mark_notification_read(db, notification_id)
+    success = await crud.mark_notification_read(db, notification_id)
     if not success:
         raise HTTPException(status_code=404, detail="Notification not found")
     return {"success": True}
@@ -317,117 +415,98 @@ def mark_notification_read(
 # ========== SETTINGS ENDPOINTS ==========
 
 @app.get("/settings", response_model=schemas.SettingsResponse)
-def get_settings(
+async def get_settings(
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get user settings"""
-    user = get_current_user_from_handle(db, handle)
-    settings = crud.get_user_settings(db, user.id)
-    
-    if not settings:
-        # Return default settings with user info
-        return schemas.SettingsResponse(
-            username=user.username,
-            display_name=user.display_name,
-            bio=user.bio,
-            email_notifications=True,
-            show_online_status=True,
-            private_account=False,
-            github_connected=False,
-            gitlab_connected=False,
-            google_connected=False,
-            discord_connected=False,
-            ascii_pic=user.ascii_pic
-        )
-    
-    return schemas.SettingsResponse(
-        username=user.username,
-        display_name=user.display_name,
-        bio=user.bio,
-        email_notifications=settings.email_notifications,
-        show_online_status=settings.show_online_status,
-        private_account=settings.private_account,
-        github_connected=settings.github_connected,
-        gitlab_connected=settings.gitlab_connected,
-        google_connected=settings.google_connected,
-        discord_connected=settings.discord_connected,
-        ascii_pic=user.ascii_pic
-    )
+    payload = await crud.get_settings_payload(db, handle)
+    if payload is None:
+        # Unknown handle: auto-create the user, as the other endpoints do
+        await get_current_user_from_handle(db, handle)
+        payload = await crud.get_settings_payload(db, handle)
+    return payload
 
 
 @app.put("/settings")
-def update_settings(
+async def update_settings(
     settings_update: schemas.SettingsUpdate,
     handle: str = Query("yourname", description="Current user handle"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user settings"""
-    user = get_current_user_from_handle(db, handle)
-    crud.update_user_settings(db, user.id, settings_update)
+    user = await get_current_user_from_handle(db, handle)
+    await crud.update_user_settings(db, user, settings_update)
     return {"success": True}
 
 
 # ========== HEALTH CHECK ==========
 
+# Static payloads are encoded once; a fresh Response is still built per request
+# because middleware (CORS, GZip) mutates response headers
+HEALTH_BODY = orjson.dumps({"status": "ok", "service": "social.vim API"})
+ROOT_BODY = orjson.dumps({
+    "service": "Social.vim API",
+    "version": "1.0.0",
+    "docs": "/docs"
+})
+
+
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
-    return {"status": "ok", "service": "social.vim API"}
+    return Response(content=HEALTH_BODY, media_type="application/json")
 
 
 @app.get("/")
-def root():
+async def root():
     """Root endpoint"""
-    return {
-        "service": "Social.vim API",
-        "version": "1.0.0",
-        "docs": "/docs"
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 
 @app.post("/admin/seed-database")
-def seed_database(db: Session = Depends(get_db)):
+async def seed_database(db: AsyncSession = Depends(get_db)):
     """
     Seed the database with demo data.
     Call this once after deployment to populate initial data.
     """
     try:
         # Check if data already exists
-        existing_users = db.query(models.User).count()
+        existing_users = await db.scalar(select(func.count()).select_from(models.User))
         if existing_users > 0:
             return {"message": "Database already seeded", "users": existing_users}
         
-        # Create demo users
+        # Create demo users (posts_count leaves out the demo posts below, which a trigger counts)
         users_data = [
-            {"username": "yourname", "display_name": "Your Name", "bio": "Building cool stuff with TUIs | vim enthusiast | developer", "followers": 891, "following": 328, "posts_count": 142},
-            {"username": "alice", "display_name": "Alice Johnson", "bio": "Full-stack developer | Open source contributor", "followers": 1234, "following": 567, "posts_count": 89},
-            {"username": "bob", "display_name": "Bob Smith", "bio": "Tech blogger | Code reviewer | Coffee enthusiast", "followers": 2345, "following": 890, "posts_count": 234},
+            {"username": "yourname", "display_name": "Your Name", "bio": "Building cool stuff with TUIs | vim enthusiast | developer", "followers": 891, "following": 328, "posts_count": 141},
+            {"username": "alice", "display_name": "Alice Johnson", "bio": "Full-stack developer | Open source contributor", "followers": 1234, "following": 567, "posts_count": 88},
+            {"username": "bob", "display_name": "Bob Smith", "bio": "Tech blogger | Code reviewer | Coffee enthusiast", "followers": 2345, "following": 890, "posts_count": 233},
             {"username": "charlie", "display_name": "Charlie Davis", "bio": "CLI tools developer | Rust advocate", "followers": 456, "following": 234, "posts_count": 67},
-            {"username": "techwriter", "display_name": "Tech Writer", "bio": "Writing about technology and development", "followers": 3456, "following": 1234, "posts_count": 456},
-            {"username": "cliexpert", "display_name": "CLI Expert", "bio": "Terminal user interface expert", "followers": 2890, "following": 1100, "posts_count": 389},
-            {"username": "vimfan", "display_name": "Vim Fan", "bio": "Vim configuration enthusiast", "followers": 1567, "following": 678, "posts_count": 234},
+            {"username": "techwriter", "display_name": "Tech Writer", "bio": "Writing about technology and development", "followers": 3456, "following": 1234, "posts_count": 455},
+            {"username": "cliexpert", "display_name": "CLI Expert", "bio": "Terminal user interface expert", "followers": 2890, "following": 1100, "posts_count": 388},
+            {"username": "vimfan", "display_name": "Vim Fan", "bio": "Vim configuration enthusiast", "followers": 1567, "following": 678, "posts_count": 233},
             {"username": "opensource_dev", "display_name": "OpenSource Dev", "bio": "Building tools for developers", "followers": 1200, "following": 450, "posts_count": 156},
         ]
         
-        created_users = {}
-        for user_data in users_data:
-            user = models.User(**user_data)
-            db.add(user)
-            db.flush()
-            created_users[user.username] = user.id
-            
-            # Create settings for each user
-            settings = models.UserSettings(
-                user_id=user.id,
-                email_notifications=True,
-                show_online_status=True,
-                private_account=False,
-                github_connected=(user.username == "yourname")
-            )
-            db.add(settings)
+        # Insert all users in one batch and read back their assigned IDs
+        result = await db.execute(
+            insert(models.User).returning(models.User.id, models.User.username),
+            users_data
+        )
+        created_users = {username: user_id for user_id, username in result}
         
-        db.commit()
+        # Create settings for each user
+        settings_rows = [
+            {
+                "user_id": user_id,
+                "email_notifications": True,
+                "show_online_status": True,
+                "private_account": False,
+                "github_connected": (username == "yourname")
+            }
+            for username, user_id in created_users.items()
+        ]
+        await db.execute(insert(models.UserSettings), settings_rows)
         
         # Create demo posts
         from datetime import datetime, timedelta
@@ -442,14 +521,17 @@ def seed_database(db: Session = Depends(get_db)):
             {"author_id": created_users["vimfan"], "author_handle": "vimfan", "content": "Finally got my vim config working with this social network.", "likes_count": 156, "reposts_count": 28, "comments_count": 12, "created_at": now - timedelta(hours=5)},
         ]
         
-        created_posts = []
-        for post_data in posts_data:
-            post = models.Post(**post_data)
-            db.add(post)
-            db.flush()
-            created_posts.append(post.id)
+        result = await db.execute(insert(models.Post).returning(models.Post.id), posts_data)
+        created_posts = result.scalars().all()
+        
+        # Users, settings and posts are committed together
+        await db.commit()
+        
+        # Rank the demo posts now rather than on the next scheduled refresh
+        await crud.refresh_discover_feed(db)
         
-        db.commit()
+        # Drop feeds cached before the seed (e.g. an empty timeline) so the demo posts show up right away
+        await cache.invalidate_tag(crud.FEED_CACHE_TAG)
         
         return {
             "success": True,
@@ -459,7 +541,7 @@ def seed_database(db: Session = Depends(get_db)):
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error seeding database: {str(e)}")
 
 
@@ -1,7 +1,7 @@
 """
 SQLAlchemy ORM models
 """
-from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, ForeignKey, CheckConstraint, UniqueConstraint
+from sqlalchemy import Boolean, Column, Integer, Float, String, Text, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, Index, DDL, column, event, table
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -21,8 +21,8 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    posts = relationship("Post", back_populates="author", cascade="all, delete-orphan")
-    settings = relationship("UserSettings", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    posts = relationship("Post", back_populates="author", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
+    settings = relationship("UserSettings", back_populates="user", uselist=False, cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
 
 
 class UserSettings(Base):
@@ -40,7 +40,7 @@ class UserSettings(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
-    user = relationship("User", back_populates="settings")
+    user = relationship("User", back_populates="settings", lazy="raise")
 
 
 class Post(Base):
@@ -53,43 +53,56 @@ class Post(Base):
     likes_count = Column(Integer, default=0)
     reposts_count = Column(Integer, default=0)
     comments_count = Column(Integer, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Timeline: WHERE (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?
+        Index('idx_posts_created', created_at.desc(), id.desc()),
+    )
     
     # Relationships
-    author = relationship("User", back_populates="posts")
-    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
-    interactions = relationship("PostInteraction", back_populates="post", cascade="all, delete-orphan")
+    author = relationship("User", back_populates="posts", lazy="raise")
+    comments = relationship("Comment", back_populates="post", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
+    interactions = relationship("PostInteraction", back_populates="post", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
 
 
 class PostInteraction(Base):
     __tablename__ = "post_interactions"
     
     id = Column(Integer, primary_key=True, index=True)
-    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     interaction_type = Column(String(20), nullable=False)  # 'like' or 'repost'
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     __table_args__ = (
+        # Also serves post_id lookups (post_id is its leftmost column)
         UniqueConstraint('post_id', 'user_id', 'interaction_type', name='uix_post_user_interaction'),
+        # user_id leads so per-user lookups (single post or post_id IN (...)) are index range scans
+        Index('idx_post_interaction_lookup', 'user_id', 'post_id', 'interaction_type'),
     )
     
     # Relationships
-    post = relationship("Post", back_populates="interactions")
+    post = relationship("Post", back_populates="interactions", lazy="raise")
 
 
 class Comment(Base):
     __tablename__ = "comments"
     
     id = Column(Integer, primary_key=True, index=True)
-    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     username = Column(String(50), nullable=False)
     text = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Keyset pagination: WHERE post_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index('idx_comments_post_created', 'post_id', created_at.desc(), id.desc()),
+    )
+    
     # Relationships
-    post = relationship("Post", back_populates="comments")
+    post = relationship("Post", back_populates="comments", lazy="raise")
 
 
 class Conversation(Base):
@@ -97,7 +110,9 @@ class Conversation(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     participant_a_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    participant_a_handle = Column(String(50), nullable=False)
     participant_b_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    participant_b_handle = Column(String(50), nullable=False)
     last_message_preview = Column(Text, default="")
     last_message_at = Column(DateTime(timezone=True), server_default=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -107,35 +122,149 @@ class Conversation(Base):
         CheckConstraint('participant_a_id < participant_b_id', name='check_participant_order'),
     )
     
-    # Relationships
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    # Relationships (participants are read through the denormalized handle columns, not User rows)
+    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
 
 
 class Message(Base):
     __tablename__ = "messages"
     
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False, index=True)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     sender_handle = Column(String(50), nullable=False)
     content = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
+    __table_args__ = (
+        # Keyset pagination: WHERE conversation_id = ? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC
+        Index('idx_messages_conversation_created', 'conversation_id', created_at.desc(), id.desc()),
+    )
+    
     # Relationships
-    conversation = relationship("Conversation", back_populates="messages")
+    conversation = relationship("Conversation", back_populates="messages", lazy="raise")
 
 
 class Notification(Base):
     __tablename__ = "notifications"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     type = Column(String(20), nullable=False)  # 'mention', 'like', 'repost', 'follow', 'comment'
     actor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     actor_handle = Column(String(50), nullable=False)
     content = Column(Text, nullable=False)
     post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=True)
-    read = Column(Boolean, default=False, index=True)
+    read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Unread only: WHERE user_id = ? AND read = false ORDER BY created_at DESC
+        Index('idx_notifications_user_read_created', 'user_id', 'read', created_at.desc()),
+        # All: WHERE user_id = ? ORDER BY created_at DESC (read in the middle of the index above would force a sort)
+        Index('idx_notifications_user_created', 'user_id', created_at.desc()),
+    )
+
+
+# Discover ranking, precomputed as a materialized view and refreshed in the background
+# (crud.refresh_discover_feed). Views aren't managed by create_all, so it is declared as a
+# lightweight table() outside the metadata and created by the DDL hooks below
+discover_feed = table(
+    "discover_feed",
+    column("id", Integer),
+    column("hot_rank", Float),
+    column("refreshed_at", DateTime(timezone=True)),
+)
+
+for statement in (
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS discover_feed AS
+    SELECT id,
+           ((likes_count * 2 + reposts_count * 3)
+            / GREATEST(EXTRACT(EPOCH FROM now() - created_at), 1))::double precision AS hot_rank,
+           now() AS refreshed_at
+    FROM posts
+    ORDER BY hot_rank DESC
+    LIMIT 500
+    """,
+    # Required by REFRESH ... CONCURRENTLY
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_discover_feed_id ON discover_feed(id)",
+    "CREATE INDEX IF NOT EXISTS idx_discover_feed_rank ON discover_feed(hot_rank DESC)",
+):
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
+# Denormalized counters (posts.likes_count/reposts_count/comments_count, users.posts_count)
+# are maintained by row triggers, so they change atomically with the rows they count.
+# The hooks fire only when create_all actually creates the table; existing databases
+# get the same triggers from schema.sql / database/migrations
+COUNTER_TRIGGERS = {
+    PostInteraction.__table__: (
+        """
+        CREATE OR REPLACE FUNCTION post_interactions_update_counts() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE posts SET
+                    likes_count = likes_count + (NEW.interaction_type = 'like')::int,
+                    reposts_count = reposts_count + (NEW.interaction_type = 'repost')::int
+                WHERE id = NEW.post_id;
+            ELSE
+                UPDATE posts SET
+                    likes_count = GREATEST(likes_count - (OLD.interaction_type = 'like')::int, 0),
+                    reposts_count = GREATEST(reposts_count - (OLD.interaction_type = 'repost')::int, 0)
+                WHERE id = OLD.post_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER trg_post_interactions_counts
+        AFTER INSERT OR DELETE ON post_interactions
+        FOR EACH ROW EXECUTE FUNCTION post_interactions_update_counts()
+        """,
+    ),
+    Comment.__table__: (
+        """
+        CREATE OR REPLACE FUNCTION comments_update_counts() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE posts SET comments_count = comments_count + 1 WHERE id = NEW.post_id;
+            ELSE
+                UPDATE posts SET comments_count = GREATEST(comments_count - 1, 0) WHERE id = OLD.post_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER trg_comments_counts
+        AFTER INSERT OR DELETE ON comments
+        FOR EACH ROW EXECUTE FUNCTION comments_update_counts()
+        """,
+    ),
+    Post.__table__: (
+        """
+        CREATE OR REPLACE FUNCTION posts_update_counts() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE users SET posts_count = posts_count + 1 WHERE id = NEW.author_id;
+            ELSE
+                UPDATE users SET posts_count = GREATEST(posts_count - 1, 0) WHERE id = OLD.author_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER trg_posts_counts
+        AFTER INSERT OR DELETE ON posts
+        FOR EACH ROW EXECUTE FUNCTION posts_update_counts()
+        """,
+    ),
+}
 
+for counted_table, statements in COUNTER_TRIGGERS.items():
+    for statement in statements:
+        event.listen(counted_table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
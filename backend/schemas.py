@@ -1,7 +1,7 @@
 """
 Pydantic schemas for request/response validation
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 from typing import Optional, List
 from datetime import datetime
 
@@ -16,27 +16,16 @@ class UserBase(BaseModel):
 
 class UserResponse(UserBase):
     id: int
-    handle: str  # alias for username
     followers: int
     following: int
     posts_count: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
     
-    @classmethod
-    def from_orm(cls, user):
-        return cls(
-            id=user.id,
-            username=user.username,
-            handle=user.username,
-            display_name=user.display_name,
-            bio=user.bio,
-            followers=user.followers,
-            following=user.following,
-            posts_count=user.posts_count,
-            ascii_pic=user.ascii_pic
-        )
+    @computed_field
+    @property
+    def handle(self) -> str:  # alias for username
+        return self.username
 
 
 # Post schemas
@@ -46,43 +35,43 @@ class PostCreate(BaseModel):
 
 class PostResponse(BaseModel):
     id: int
-    author: str
     author_handle: str
     author_id: int
     content: str
-    timestamp: datetime
     created_at: datetime
-    likes: int
     likes_count: int
-    reposts: int
     reposts_count: int
-    comments: int
     comments_count: int
     liked_by_user: bool = False
     reposted_by_user: bool = False
     
-    class Config:
-        from_attributes = True
-    
-    @classmethod
-    def from_orm(cls, post, user_id: Optional[int] = None, liked_by_user: bool = False, reposted_by_user: bool = False):
-        return cls(
-            id=post.id,
-            author=post.author_handle,
-            author_handle=post.author_handle,
-            author_id=post.author_id,
-            content=post.content,
-            timestamp=post.created_at,
-            created_at=post.created_at,
-            likes=post.likes_count,
-            likes_count=post.likes_count,
-            reposts=post.reposts_count,
-            reposts_count=post.reposts_count,
-            comments=post.comments_count,
-            comments_count=post.comments_count,
-            liked_by_user=liked_by_user,
-            reposted_by_user=reposted_by_user
-        )
+    model_config = ConfigDict(from_attributes=True)
+    
+    # Client-facing aliases: emitted in responses, but validated and stored only once
+    @computed_field
+    @property
+    def author(self) -> str:
+        return self.author_handle
+    
+    @computed_field
+    @property
+    def timestamp(self) -> datetime:
+        return self.created_at
+    
+    @computed_field
+    @property
+    def likes(self) -> int:
+        return self.likes_count
+    
+    @computed_field
+    @property
+    def reposts(self) -> int:
+        return self.reposts_count
+    
+    @computed_field
+    @property
+    def comments(self) -> int:
+        return self.comments_count
 
 
 # Comment schemas
@@ -94,8 +83,7 @@ class CommentResponse(BaseModel):
     user: str
     text: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Message schemas
@@ -108,23 +96,15 @@ class MessageResponse(BaseModel):
     id: int
     sender_id: int
     content: str
-    timestamp: datetime
     created_at: datetime
     is_read: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
     
-    @classmethod
-    def from_orm(cls, message):
-        return cls(
-            id=message.id,
-            sender_id=message.sender_id,
-            content=message.content,
-            timestamp=message.created_at,
-            created_at=message.created_at,
-            is_read=message.is_read
-        )
+    @computed_field
+    @property
+    def timestamp(self) -> datetime:
+        return self.created_at
 
 
 # Conversation schemas
@@ -140,38 +120,30 @@ class ConversationResponse(BaseModel):
     last_message_at: datetime
     unread: bool = False
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Notification schemas
 class NotificationResponse(BaseModel):
     id: int
     type: str
-    actor: str
-    username: str
+    actor: str = Field(validation_alias="actor_handle")
     content: str
-    timestamp: datetime
     created_at: datetime
     read: bool
     post_id: Optional[int] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    
+    @computed_field
+    @property
+    def username(self) -> str:
+        return self.actor
     
-    @classmethod
-    def from_orm(cls, notification):
-        return cls(
-            id=notification.id,
-            type=notification.type,
-            actor=notification.actor_handle,
-            username=notification.actor_handle,
-            content=notification.content,
-            timestamp=notification.created_at,
-            created_at=notification.created_at,
-            read=notification.read,
-            post_id=notification.post_id
-        )
+    @computed_field
+    @property
+    def timestamp(self) -> datetime:
+        return self.created_at
 
 
 # Settings schemas
@@ -198,6 +170,5 @@ class SettingsResponse(BaseModel):
     discord_connected: bool
     ascii_pic: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,83 @@
+"""
+Shared fixtures for the API tests
+
+The tests run against a real Postgres database (the app relies on Postgres-only SQL such as
+materialized views and triggers) and are skipped unless DATABASE_URL points at one.
+Use a scratch database: the fixtures create the schema and seed it.
+"""
+import os
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Count database statements, not Redis cache hits
+os.environ.pop("REDIS_URL", None)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+# Statements executed in the current context while count_queries() is active
+_query_log: ContextVar[Optional[List[str]]] = ContextVar("query_log", default=None)
+
+
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    queries = _query_log.get()
+    if queries is not None:
+        queries.append(statement)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """HTTP client for the app, backed by a created and seeded database"""
+    if not DATABASE_URL.startswith("postgres"):
+        pytest.skip("DATABASE_URL is not set to a Postgres database")
+    
+    import httpx
+    from database import engine
+    from main import app, create_tables
+    
+    await create_tables()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/admin/seed-database")
+        assert response.status_code == 200, response.text
+        yield client
+    
+    # Pooled asyncpg connections are bound to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Collect the SQL statements executed inside the block, e.g. to catch N+1 regressions:
+
+        with count_queries() as queries:
+            ...
+        assert len(queries) <= 3
+    """
+    from sqlalchemy import event
+    from database import engine
+    
+    @contextmanager
+    def count():
+        queries: List[str] = []
+        token = _query_log.set(queries)
+        try:
+            yield queries
+        finally:
+            _query_log.reset(token)
+    
+    event.listen(engine.sync_engine, "before_cursor_execute", _record_query)
+    try:
+        yield count
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record_query)
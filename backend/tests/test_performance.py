@@ -0,0 +1,48 @@
+"""
+Query-count budgets for the list endpoints
+
+Each list is served by a fixed number of statements however many rows it returns,
+so an N+1 regression shows up as a blown budget.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+# The feed itself, the current user and that user's likes/reposts for the whole page
+FEED_QUERY_BUDGET = 3
+
+
+@pytest.mark.parametrize("path", ["/timeline", "/discover"])
+async def test_feed_query_count(client, count_queries, path):
+    with count_queries() as queries:
+        response = await client.get(path, params={"limit": 50, "handle": "yourname"})
+    
+    assert response.status_code == 200
+    assert response.json()
+    assert len(queries) <= FEED_QUERY_BUDGET, queries
+
+
+async def test_conversations_query_count(client, count_queries):
+    for other in ("alice", "bob", "techwriter"):
+        response = await client.post("/dm", json={"user_a_handle": "yourname", "user_b_handle": other})
+        assert response.status_code == 200
+    
+    with count_queries() as queries:
+        response = await client.get("/conversations", params={"handle": "yourname"})
+    
+    assert response.status_code == 200
+    assert len(response.json()) >= 3
+    assert len(queries) <= 3, queries
+
+
+async def test_settings_query_count(client, count_queries):
+    import crud
+    
+    # Cold cache: the user and its settings come from a single joined query
+    crud.user_cache.clear()
+    with count_queries() as queries:
+        response = await client.get("/settings", params={"handle": "alice"})
+    
+    assert response.status_code == 200
+    assert response.json()["username"] == "alice"
+    assert len(queries) == 1, queries
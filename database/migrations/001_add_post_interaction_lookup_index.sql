@@ -0,0 +1,12 @@
+-- Compound user-first index for per-user like/repost lookups
+-- (uix_post_user_interaction already enforces uniqueness, so this one is a plain index)
+CREATE INDEX IF NOT EXISTS idx_post_interaction_lookup
+    ON post_interactions(user_id, post_id, interaction_type);
+
+-- Superseded by the index above (user_id is its leftmost column)
+DROP INDEX IF EXISTS idx_post_interactions_user;
+DROP INDEX IF EXISTS ix_post_interactions_user_id;
+
+-- Covered by uix_post_user_interaction (post_id is its leftmost column)
+DROP INDEX IF EXISTS idx_post_interactions_post;
+DROP INDEX IF EXISTS ix_post_interactions_post_id;
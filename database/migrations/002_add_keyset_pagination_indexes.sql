@@ -0,0 +1,10 @@
+-- Composite indexes for keyset pagination of messages and comments on a (created_at, id) cursor
+-- (id breaks ties between rows created in the same instant)
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created ON messages(conversation_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_comments_post_created ON comments(post_id, created_at DESC, id DESC);
+
+-- Superseded by the indexes above (same leading column)
+DROP INDEX IF EXISTS idx_messages_conversation;
+DROP INDEX IF EXISTS ix_messages_conversation_id;
+DROP INDEX IF EXISTS idx_comments_post;
+DROP INDEX IF EXISTS ix_comments_post_id;
@@ -0,0 +1,13 @@
+-- Precompute the /discover ranking as a materialized view. refreshed_at lets the refresh
+-- loop in each worker skip the rebuild when another worker has just done it
+CREATE MATERIALIZED VIEW IF NOT EXISTS discover_feed AS
+SELECT id,
+       ((likes_count * 2 + reposts_count * 3)
+        / GREATEST(EXTRACT(EPOCH FROM now() - created_at), 1))::double precision AS hot_rank,
+       now() AS refreshed_at
+FROM posts
+ORDER BY hot_rank DESC
+LIMIT 500;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_discover_feed_id ON discover_feed(id);
+CREATE INDEX IF NOT EXISTS idx_discover_feed_rank ON discover_feed(hot_rank DESC);
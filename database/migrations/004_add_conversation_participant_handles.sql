@@ -0,0 +1,14 @@
+-- Denormalize participant handles onto conversations so /conversations needs no user lookups
+ALTER TABLE conversations
+    ADD COLUMN IF NOT EXISTS participant_a_handle VARCHAR(50),
+    ADD COLUMN IF NOT EXISTS participant_b_handle VARCHAR(50);
+
+UPDATE conversations c
+SET participant_a_handle = a.username,
+    participant_b_handle = b.username
+FROM users a, users b
+WHERE a.id = c.participant_a_id AND b.id = c.participant_b_id;
+
+ALTER TABLE conversations
+    ALTER COLUMN participant_a_handle SET NOT NULL,
+    ALTER COLUMN participant_b_handle SET NOT NULL;
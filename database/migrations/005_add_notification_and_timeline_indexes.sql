@@ -0,0 +1,15 @@
+-- Composite indexes for per-user notification listing, newest first: unread only, and all
+-- (with read as the middle column, the first index cannot return all notifications in order without a sort)
+CREATE INDEX IF NOT EXISTS idx_notifications_user_read_created ON notifications(user_id, read, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON notifications(user_id, created_at DESC);
+
+-- Superseded by the indexes above (user_id is their leftmost column; read alone is too unselective)
+DROP INDEX IF EXISTS idx_notifications_user;
+DROP INDEX IF EXISTS ix_notifications_user_id;
+DROP INDEX IF EXISTS idx_notifications_read;
+DROP INDEX IF EXISTS ix_notifications_read;
+
+-- Timeline ordering on a (created_at, id) cursor; databases created by create_all only had the
+-- ascending ix_posts_created_at
+CREATE INDEX IF NOT EXISTS idx_posts_created ON posts(created_at DESC, id DESC);
+DROP INDEX IF EXISTS ix_posts_created_at;
@@ -0,0 +1,54 @@
+-- Maintain denormalized counters with triggers instead of application-side UPDATEs
+CREATE OR REPLACE FUNCTION post_interactions_update_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET
+            likes_count = likes_count + (NEW.interaction_type = 'like')::int,
+            reposts_count = reposts_count + (NEW.interaction_type = 'repost')::int
+        WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET
+            likes_count = GREATEST(likes_count - (OLD.interaction_type = 'like')::int, 0),
+            reposts_count = GREATEST(reposts_count - (OLD.interaction_type = 'repost')::int, 0)
+        WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION comments_update_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET comments_count = comments_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET comments_count = GREATEST(comments_count - 1, 0) WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION posts_update_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE users SET posts_count = posts_count + 1 WHERE id = NEW.author_id;
+    ELSE
+        UPDATE users SET posts_count = GREATEST(posts_count - 1, 0) WHERE id = OLD.author_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_post_interactions_counts ON post_interactions;
+CREATE TRIGGER trg_post_interactions_counts
+AFTER INSERT OR DELETE ON post_interactions
+FOR EACH ROW EXECUTE FUNCTION post_interactions_update_counts();
+
+DROP TRIGGER IF EXISTS trg_comments_counts ON comments;
+CREATE TRIGGER trg_comments_counts
+AFTER INSERT OR DELETE ON comments
+FOR EACH ROW EXECUTE FUNCTION comments_update_counts();
+
+DROP TRIGGER IF EXISTS trg_posts_counts ON posts;
+CREATE TRIGGER trg_posts_counts
+AFTER INSERT OR DELETE ON posts
+FOR EACH ROW EXECUTE FUNCTION posts_update_counts();
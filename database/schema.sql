@@ -1,5 +1,6 @@
 -- PostgreSQL Schema for Social.vim Application
 -- Drop tables if they exist (for clean setup)
+DROP MATERIALIZED VIEW IF EXISTS discover_feed;
 DROP TABLE IF EXISTS comments CASCADE;
 DROP TABLE IF EXISTS notifications CASCADE;
 DROP TABLE IF EXISTS messages CASCADE;
@@ -71,7 +72,9 @@ CREATE TABLE comments (
 CREATE TABLE conversations (
     id SERIAL PRIMARY KEY,
     participant_a_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    participant_a_handle VARCHAR(50) NOT NULL,
     participant_b_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    participant_b_handle VARCHAR(50) NOT NULL,
     last_message_preview TEXT DEFAULT '',
     last_message_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -105,12 +108,75 @@ CREATE TABLE notifications (
 
 -- Indexes for performance
 CREATE INDEX idx_posts_author ON posts(author_id);
-CREATE INDEX idx_posts_created ON posts(created_at DESC);
-CREATE INDEX idx_messages_conversation ON messages(conversation_id);
+CREATE INDEX idx_posts_created ON posts(created_at DESC, id DESC);
+CREATE INDEX idx_messages_conversation_created ON messages(conversation_id, created_at DESC, id DESC);
 CREATE INDEX idx_messages_created ON messages(created_at DESC);
-CREATE INDEX idx_notifications_user ON notifications(user_id);
-CREATE INDEX idx_notifications_read ON notifications(read);
-CREATE INDEX idx_comments_post ON comments(post_id);
-CREATE INDEX idx_post_interactions_post ON post_interactions(post_id);
-CREATE INDEX idx_post_interactions_user ON post_interactions(user_id);
+CREATE INDEX idx_notifications_user_read_created ON notifications(user_id, read, created_at DESC);
+CREATE INDEX idx_notifications_user_created ON notifications(user_id, created_at DESC);
+CREATE INDEX idx_comments_post_created ON comments(post_id, created_at DESC, id DESC);
+CREATE INDEX idx_post_interaction_lookup ON post_interactions(user_id, post_id, interaction_type);
 
+-- Denormalized counters are maintained by triggers, atomically with the rows they count
+CREATE OR REPLACE FUNCTION post_interactions_update_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET
+            likes_count = likes_count + (NEW.interaction_type = 'like')::int,
+            reposts_count = reposts_count + (NEW.interaction_type = 'repost')::int
+        WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET
+            likes_count = GREATEST(likes_count - (OLD.interaction_type = 'like')::int, 0),
+            reposts_count = GREATEST(reposts_count - (OLD.interaction_type = 'repost')::int, 0)
+        WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION comments_update_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET comments_count = comments_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET comments_count = GREATEST(comments_count - 1, 0) WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION posts_update_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE users SET posts_count = posts_count + 1 WHERE id = NEW.author_id;
+    ELSE
+        UPDATE users SET posts_count = GREATEST(posts_count - 1, 0) WHERE id = OLD.author_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_post_interactions_counts
+AFTER INSERT OR DELETE ON post_interactions
+FOR EACH ROW EXECUTE FUNCTION post_interactions_update_counts();
+
+CREATE TRIGGER trg_comments_counts
+AFTER INSERT OR DELETE ON comments
+FOR EACH ROW EXECUTE FUNCTION comments_update_counts();
+
+CREATE TRIGGER trg_posts_counts
+AFTER INSERT OR DELETE ON posts
+FOR EACH ROW EXECUTE FUNCTION posts_update_counts();
+
+-- Discover ranking, refreshed periodically by the backend (REFRESH MATERIALIZED VIEW CONCURRENTLY)
+CREATE MATERIALIZED VIEW discover_feed AS
+SELECT id,
+       ((likes_count * 2 + reposts_count * 3)
+        / GREATEST(EXTRACT(EPOCH FROM now() - created_at), 1))::double precision AS hot_rank,
+       now() AS refreshed_at
+FROM posts
+ORDER BY hot_rank DESC
+LIMIT 500;
+
+CREATE UNIQUE INDEX idx_discover_feed_id ON discover_feed(id);
+CREATE INDEX idx_discover_feed_rank ON discover_feed(hot_rank DESC);
@@ -1,23 +1,23 @@
 -- Seed Data for Social.vim Application
--- Insert demo users
+-- Insert demo users (posts_count leaves out each user's demo post below, which the posts trigger counts)
 INSERT INTO users (username, display_name, bio, followers, following, posts_count) VALUES
-('yourname', 'Your Name', 'Building cool stuff with TUIs | vim enthusiast | developer', 891, 328, 142),
-('alice', 'Alice Johnson', 'Full-stack developer | Open source contributor', 1234, 567, 89),
-('bob', 'Bob Smith', 'Tech blogger | Code reviewer | Coffee enthusiast', 2345, 890, 234),
-('charlie', 'Charlie Davis', 'CLI tools developer | Rust advocate', 456, 234, 67),
-('techwriter', 'Tech Writer', 'Writing about technology and development', 3456, 1234, 456),
-('cliexpert', 'CLI Expert', 'Terminal user interface expert', 2890, 1100, 389),
-('vimfan', 'Vim Fan', 'Vim configuration enthusiast', 1567, 678, 234),
-('opensource_dev', 'OpenSource Dev', 'Building tools for developers', 1200, 450, 156);
+('yourname', 'Your Name', 'Building cool stuff with TUIs | vim enthusiast | developer', 891, 328, 141),
+('alice', 'Alice Johnson', 'Full-stack developer | Open source contributor', 1234, 567, 88),
+('bob', 'Bob Smith', 'Tech blogger | Code reviewer | Coffee enthusiast', 2345, 890, 233),
+('charlie', 'Charlie Davis', 'CLI tools developer | Rust advocate', 456, 234, 66),
+('techwriter', 'Tech Writer', 'Writing about technology and development', 3456, 1234, 455),
+('cliexpert', 'CLI Expert', 'Terminal user interface expert', 2890, 1100, 388),
+('vimfan', 'Vim Fan', 'Vim configuration enthusiast', 1567, 678, 233),
+('opensource_dev', 'OpenSource Dev', 'Building tools for developers', 1200, 450, 155);
 
 -- Insert user settings for all users
 INSERT INTO user_settings (user_id, email_notifications, show_online_status, private_account, github_connected) 
 SELECT id, TRUE, TRUE, FALSE, (username = 'yourname') FROM users;
 
--- Insert demo posts
+-- Insert demo posts (counters leave out the likes and comments below, which the triggers count)
 INSERT INTO posts (author_id, author_handle, content, likes_count, reposts_count, comments_count, created_at) VALUES
-((SELECT id FROM users WHERE username = 'yourname'), 'yourname', 'Just shipped a new feature! The TUI is looking amazing 🚀', 12, 3, 2, NOW() - INTERVAL '5 minutes'),
-((SELECT id FROM users WHERE username = 'alice'), 'alice', 'Working on a new CLI tool for developers. Any testers?', 45, 12, 1, NOW() - INTERVAL '15 minutes'),
+((SELECT id FROM users WHERE username = 'yourname'), 'yourname', 'Just shipped a new feature! The TUI is looking amazing 🚀', 10, 3, 0, NOW() - INTERVAL '5 minutes'),
+((SELECT id FROM users WHERE username = 'alice'), 'alice', 'Working on a new CLI tool for developers. Any testers?', 44, 12, 0, NOW() - INTERVAL '15 minutes'),
 ((SELECT id FROM users WHERE username = 'bob'), 'bob', 'Refactoring is like cleaning your room. You know where everything is in the mess, but it''s still better to organize it.', 234, 67, 0, NOW() - INTERVAL '1 hour'),
 ((SELECT id FROM users WHERE username = 'techwriter'), 'techwriter', 'Just discovered this amazing TUI framework! #vim #tui #opensource', 234, 45, 18, NOW() - INTERVAL '2 hours'),
 ((SELECT id FROM users WHERE username = 'cliexpert'), 'cliexpert', 'Hot take: TUIs are making a comeback! 💻', 189, 52, 34, NOW() - INTERVAL '4 hours'),
@@ -38,25 +38,16 @@ INSERT INTO comments (post_id, user_id, username, text) VALUES
 (2, (SELECT id FROM users WHERE username = 'charlie'), 'charlie', 'Count me in');
 
 -- Insert conversations (ensure participant_a_id < participant_b_id)
-INSERT INTO conversations (participant_a_id, participant_b_id, last_message_preview, last_message_at) VALUES
-(
-    LEAST((SELECT id FROM users WHERE username = 'yourname'), (SELECT id FROM users WHERE username = 'alice')),
-    GREATEST((SELECT id FROM users WHERE username = 'yourname'), (SELECT id FROM users WHERE username = 'alice')),
-    'Thanks! Let me know if you need...',
-    NOW() - INTERVAL '2 minutes'
-),
-(
-    LEAST((SELECT id FROM users WHERE username = 'yourname'), (SELECT id FROM users WHERE username = 'charlie')),
-    GREATEST((SELECT id FROM users WHERE username = 'yourname'), (SELECT id FROM users WHERE username = 'charlie')),
-    'That sounds perfect!',
-    NOW() - INTERVAL '1 hour'
-),
-(
-    LEAST((SELECT id FROM users WHERE username = 'yourname'), (SELECT id FROM users WHERE username = 'bob')),
-    GREATEST((SELECT id FROM users WHERE username = 'yourname'), (SELECT id FROM users WHERE username = 'bob')),
-    'Working on a new CLI tool...',
-    NOW() - INTERVAL '3 hours'
-);
+INSERT INTO conversations (participant_a_id, participant_a_handle, participant_b_id, participant_b_handle, last_message_preview, last_message_at)
+SELECT a.id, a.username, b.id, b.username, c.preview, c.sent_at
+FROM (VALUES
+    (1, 'yourname', 'alice', 'Thanks! Let me know if you need...', NOW() - INTERVAL '2 minutes'),
+    (2, 'yourname', 'charlie', 'That sounds perfect!', NOW() - INTERVAL '1 hour'),
+    (3, 'yourname', 'bob', 'Working on a new CLI tool...', NOW() - INTERVAL '3 hours')
+) AS c(ord, handle_1, handle_2, preview, sent_at)
+JOIN users a ON a.username IN (c.handle_1, c.handle_2)
+JOIN users b ON b.username IN (c.handle_1, c.handle_2) AND b.id > a.id
+ORDER BY c.ord;
 
 -- Insert messages for conversation between yourname and alice
 INSERT INTO messages (conversation_id, sender_id, sender_handle, content, is_read, created_at) VALUES
@@ -71,3 +62,5 @@ INSERT INTO notifications (user_id, type, actor_id, actor_handle, content, post_
 ((SELECT id FROM users WHERE username = 'yourname'), 'mention', (SELECT id FROM users WHERE username = 'charlie'), 'charlie', '@yourname what do you think?', 4, FALSE, NOW() - INTERVAL '5 minutes'),
 ((SELECT id FROM users WHERE username = 'yourname'), 'like', (SELECT id FROM users WHERE username = 'alice'), 'alice', 'liked your post', 1, FALSE, NOW() - INTERVAL '15 minutes');
 
+-- Rank the seeded posts for /discover
+REFRESH MATERIALIZED VIEW discover_feed;